@@ -0,0 +1,81 @@
+import argparse
+
+from ortools.sat.python import cp_model
+
+from project_planning_task3 import build_project_planning_model, load_project_data
+from solver_profiles import make_solver
+
+# Explain why the project planning has no solution.
+# Every constraint family (profit margin, each dependency or conflict, staffing per project, capacity
+# per contractor) is enforced by an assumption literal. When the model is infeasible, the solver
+# returns a subset of the assumptions that is already infeasible on its own (a conflicting core).
+# The core can then be minimized by removing one constraint family at a time: if the model stays
+# infeasible without it, it is not needed to explain the conflict.
+# reference: https://github.com/google/or-tools/blob/stable/ortools/sat/samples/assumptions_sample_sat.py
+# usage: python explain_infeasibility.py --min-profit-margin 10000
+
+
+def solve_with_assumptions(model, names, assumptions, solver):
+    # Solve with only the given constraint families enforced, returns the status and the
+    # names of the families in the core (if infeasible)
+    model.ClearAssumptions()
+    model.AddAssumptions([assumptions[name] for name in names])
+    status = solver.Solve(model)
+    if status != cp_model.INFEASIBLE:
+        return status, None
+    core = set(solver.SufficientAssumptionsForInfeasibility())
+    return status, [name for name in names if assumptions[name].Index() in core]
+
+
+def explain_infeasibility(file_path, minimize=True, min_profit_margin=2160, profile="fast-feasible", **overrides):
+    assumptions = {}
+    model, _, _, _ = build_project_planning_model(*load_project_data(file_path), assumptions=assumptions,
+                                                  min_profit_margin=min_profit_margin)
+    # the core is only extracted by a single worker, whatever num_workers the caller passes
+    solver = make_solver(profile, **dict(overrides, num_workers=1))
+    solver_calls = 1
+
+    status, core = solve_with_assumptions(model, list(assumptions), assumptions, solver)
+    if status != cp_model.INFEASIBLE:
+        print('The project planning is ' + solver.StatusName(status) + ', nothing to explain.')
+        return None
+
+    if not core:
+        print('The project planning is infeasible even without the constraint families, check the data.')
+        return core
+
+    if minimize:
+        # Deletion based minimization: try to leave out each constraint family of the core
+        needed = []
+        remaining = list(core)
+        while remaining:
+            name = remaining.pop(0)
+            status, smaller_core = solve_with_assumptions(model, needed + remaining, assumptions, solver)
+            solver_calls += 1
+            if status == cp_model.INFEASIBLE:
+                # still infeasible without it, continue with the (possibly even smaller) new core
+                remaining = [other for other in remaining if other in smaller_core]
+            else:
+                # needed for the conflict (or the solver gave up on this candidate)
+                needed.append(name)
+        core = needed
+
+    print('Conflicting constraints (' + str(len(core)) + ' of ' + str(len(assumptions)) + ', ' +
+          str(solver_calls) + ' solver calls):')
+    for name in core:
+        print(' - ' + name)
+    return core
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain why the project planning has no solution")
+    parser.add_argument("--file-path", default="datasets/Assignment_DA_1_data.xlsx")
+    parser.add_argument("--min-profit-margin", type=int, default=2160)
+    parser.add_argument("--no-minimize", action="store_true", help="report the first core found by the solver")
+    parser.add_argument("--profile", default="fast-feasible")
+    args = parser.parse_args()
+    explain_infeasibility(args.file_path, not args.no_minimize, args.min_profit_margin, args.profile)
+
+
+if __name__ == "__main__":
+    main()
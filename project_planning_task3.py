@@ -1,41 +1,41 @@
 import pandas as pd
-import numpy as np
 from ortools.sat.python import cp_model
 
+from solution_collector import flatten
+from solver_profiles import make_solver
+
 
 # reference: Lecture_DA_10_Linear_constraints.pdf
 # reference: https://sparkbyexamples.com/pandas/pandas-read-excel-with-examples/
 # ^ set the first column as the index of the df3_dependencies. So its easier to see the relationship btwn the two projects
 
 
-class ProjectPlanningSolutionPrinter(cp_model.CpSolverSolutionCallback):
-    def __init__(self, projects_to_take_on, contractor_project_month, profit_margin_expr):
-        cp_model.CpSolverSolutionCallback.__init__(self)
-        self._projects_to_take_on = projects_to_take_on
-        self._contractor_project_month = contractor_project_month
-        self._profit_margin_expr = profit_margin_expr
-        self._solution_count = 0
-
-    def on_solution_callback(self):
-        self._solution_count += 1
-        print('Solution ' + str(self._solution_count))
-        print('Projects taken on:')
-        for project, var in self._projects_to_take_on.items():
-            if self.Value(var):
-                print(project)
-        print('Contractor work/duration:')
-        for (contractor, project, job, month), var in self._contractor_project_month.items():
-            if self.Value(var):
-                print("Contractor " + contractor + " works on " + project + "(" + job + ")" + " in " " month")
-        print('Profit margin: ' + str(self.Value(self._profit_margin_expr)))
-
-        print()
-
-    def solution_count(self):
-        return self._solution_count
-
-
-def project_planning(file_path):
+# Render one solution collected by the SolutionCollector.
+# keys are ('project', project) and ('assignment', contractor, project, job, month)
+def render_project_plan(number, assignment, margin_label='Profit margin'):
+    lines = ['Solution ' + str(number), 'Projects taken on:']
+    for key, value in assignment.items():
+        if key[0] == 'project' and value:
+            lines.append(key[1])
+    lines.append('Contractor work/duration:')
+    for key, value in assignment.items():
+        if key[0] == 'assignment' and value:
+            _, contractor, project, job, month = key
+            lines.append("Contractor " + contractor + " works on " + project + "(" + job + ")" + " in " + month)
+    lines.append(margin_label + ': ' + str(assignment['Profit margin']))
+    lines.append('')
+    return "\n".join(lines)
+
+
+# The final solution of the solver in the same form as the solutions of the SolutionCollector
+def final_plan(solver, projects_to_take_on, contractor_project_month, profit_margin_expr):
+    keys, variables = flatten({'project': projects_to_take_on, 'assignment': contractor_project_month})
+    assignment = {key: int(solver.Value(variable)) for key, variable in zip(keys, variables)}
+    assignment['Profit margin'] = int(solver.Value(profit_margin_expr))
+    return assignment
+
+
+def load_project_data(file_path):
     # --------------------------------------------A--------------------------------------------------
     # Load the excel file Assignment_DA_1_data.xlsx and extract all relevant information [1 point].
     # -----------------------------------------------------------------------------------------------
@@ -46,10 +46,32 @@ def project_planning(file_path):
     df2_quotes = pd.read_excel(xls, 'Quotes')
     df3_dependencies = pd.read_excel(xls, 'Dependencies', index_col=0)
     df4_value = pd.read_excel(xls, 'Value', index_col=0)
-
+    return df1_projects, df2_quotes, df3_dependencies, df4_value
+
+
+# Build the CP-SAT model for the given months (default: all months of the Projects sheet).
+# committed is used by the rolling horizon planning: {'projects': {project: 0 or 1}, 'cost': int}
+# fixes the decisions of projects that already started and adds the cost of the already
+# committed months to the profit margin.
+# assumptions is used by the infeasibility explanation: when a dictionary is given, every constraint
+# family (profit margin, each dependency or conflict, staffing per project, capacity per contractor)
+# is only enforced if its assumption literal is true, and the literals are stored by name in it.
+def build_project_planning_model(df1_projects, df2_quotes, df3_dependencies, df4_value, months=None, committed=None,
+                                 assumptions=None, min_profit_margin=2160):
     # Identify and create solutions in a CP-SAT model that you need to decide what projects to take on
     model = cp_model.CpModel()
 
+    # Add a constraint of the named family, enforced by the given conditions and (in explain mode)
+    # by the assumption literal of the family
+    def enforce(constraint, family, *conditions):
+        literals = list(conditions)
+        if assumptions is not None:
+            if family not in assumptions:
+                assumptions[family] = model.NewBoolVar(family)
+            literals.append(assumptions[family])
+        if literals:
+            constraint.OnlyEnforceIf(literals)
+
     # ----------------------------------------------------------------------------------------------
     #  Make sure to use the data from the file in your code, please do not hardcode any values that
     #  can be read from the file
@@ -61,7 +83,8 @@ def project_planning(file_path):
 
     # Have a list of months
     # ['M1', 'M2', 'M3', 'M4', 'M5', 'M6', 'M7', 'M8', 'M9', 'M10', 'M11', 'M12']
-    months = list(df1_projects.columns[1:])
+    if months is None:
+        months = list(df1_projects.columns[1:])
 
     # Have a list of contractors
     # ['Contractor A', 'Contractor B', 'Contractor C', 'Contractor D', 'Contractor E', 'Contractor F', 'Contractor G', 'Contractor H', 'Contractor I', 'Contractor J', 'Contractor K']
@@ -81,6 +104,12 @@ def project_planning(file_path):
     for project in projects:
         projects_to_take_on[project] = model.NewBoolVar(project)
 
+    # Projects that were already decided in committed months keep their decision
+    if committed is not None:
+        for project, decision in committed['projects'].items():
+            if project in projects_to_take_on:
+                model.Add(projects_to_take_on[project] == decision)
+
     # -----------------------------------------------------------------------------------------------
     # Also identify and create the decision variables you need to
     # decide, which contractor is working on which project and when. Make sure to consider that
@@ -102,7 +131,7 @@ def project_planning(file_path):
                         df2_quotes.loc[df2_quotes[df2_quotes.columns[0]] == contractor, job].values[0]
                     # Make sure to consider that not all contractors are qualified to work on all jobs
                     # Logic:  A quote exists for the contractor in the Excel cell if he is qualified, else it is empty
-                    if quotes_for_contractor_job is not np.nan:
+                    if not pd.isna(quotes_for_contractor_job):
                         # Contractor + Project (including job) + Month
                         # so will look like: "Contractor K + Project I + Job K + M12"
                         contractor_project_month[(contractor, project, job, month)] = model.NewBoolVar(
@@ -138,9 +167,10 @@ def project_planning(file_path):
     # Constraint:  A contractor can only work on one project in a month
     for contractor in contractors:
         for month in months:
-            model.Add(sum(contractor_project_month[(contractor, project, job, month)]
-                          for project in projects for job in jobs
-                          if (contractor, project, job, month) in contractor_project_month) <= 1)
+            enforce(model.Add(sum(contractor_project_month[(contractor, project, job, month)]
+                                  for project in projects for job in jobs
+                                  if (contractor, project, job, month) in contractor_project_month) <= 1),
+                    "capacity of " + contractor)
 
     # --------------------------------------------D--------------------------------------------------
     # Define and implement the constraint that if a project is accepted to be delivered then
@@ -154,14 +184,16 @@ def project_planning(file_path):
             job_for_project_month = list(
                 df1_projects.loc[df1_projects[df1_projects.columns[0]] == project, month].dropna())
             # print(job_for_project_month)
-            contractor_assignments = []
-            for contractor in contractors:
-                # see if contractor is qualified for the job
-                if (contractor, project, job, month) in contractor_project_month:
-                    contractor_assignments.append(contractor_project_month[(contractor, project, job, month)])
-            # constraint: only one contractpr is assigned if the particular project is taken on
-            if contractor_assignments:
-                model.Add(sum(contractor_assignments) == 1).OnlyEnforceIf(projects_to_take_on[project])
+            for job in job_for_project_month:
+                contractor_assignments = []
+                for contractor in contractors:
+                    # see if contractor is qualified for the job
+                    if (contractor, project, job, month) in contractor_project_month:
+                        contractor_assignments.append(contractor_project_month[(contractor, project, job, month)])
+                # constraint: only one contractpr is assigned if the particular project is taken on
+                if contractor_assignments:
+                    enforce(model.Add(sum(contractor_assignments) == 1), "staffing of " + project,
+                            projects_to_take_on[project])
 
     # --------------------------------------------E--------------------------------------------------
     #  Define and implement the constraint that if a project is not taken on then no one should be
@@ -188,11 +220,15 @@ def project_planning(file_path):
             if project_row != project_col:
                 # dependent. (e.g. Project B can only be taken on, if also Project A is taken on)
                 if df3_dependencies.at[project_row, project_col] == "required":
-                    model.Add(projects_to_take_on[project_row] <= projects_to_take_on[project_col])
+                    enforce(model.Add(projects_to_take_on[project_row] <= projects_to_take_on[project_col]),
+                            project_row + " requires " + project_col)
                     # print("Required constraints: " + str(project_row) + " requires " + str(project_col))
                 # if they conflict, none can be taken
                 elif df3_dependencies.at[project_row, project_col] == 'conflict':
-                    model.Add(projects_to_take_on[project_row] + projects_to_take_on[project_col] <= 1)
+                    # conflicts are stored in both directions, both constraints share the family of the pair
+                    first, second = sorted([project_row, project_col])
+                    enforce(model.Add(projects_to_take_on[project_row] + projects_to_take_on[project_col] <= 1),
+                            first + " conflicts with " + second)
                     # print("Conflict constraint: " + str(project_row) + " conflicts with " + str(project_col))
 
     # --------------------------------------------G--------------------------------------------------
@@ -215,7 +251,8 @@ def project_planning(file_path):
 
     # Set the first column as the index if it's not already.
     # getting the error KeyError: 'Contractor A' if i dont do this
-    df2_quotes.set_index(df2_quotes.columns[0], inplace=True)
+    # (not inplace, so the same data can be used to build several models)
+    df2_quotes = df2_quotes.set_index(df2_quotes.columns[0])
 
     # Calculate the total subcontractor cost
     total_subcontractor_cost_expr = model.NewIntVar(0, 1000000, 'total_subcontractor_cost')
@@ -233,7 +270,17 @@ def project_planning(file_path):
 
     # Profit margin constraint
     profit_margin_expr = total_delivered_value - total_subcontractor_cost_expr
-    model.Add(profit_margin_expr >= 2160)
+    if committed is not None:
+        # the contractors of the committed months are already paid for
+        profit_margin_expr = profit_margin_expr - committed['cost']
+    enforce(model.Add(profit_margin_expr >= min_profit_margin), "profit margin >= " + str(min_profit_margin))
+
+    return model, projects_to_take_on, contractor_project_month, profit_margin_expr
+
+
+def project_planning(file_path, profile="deterministic", min_profit_margin=2160, **overrides):
+    model, projects_to_take_on, contractor_project_month, profit_margin_expr = build_project_planning_model(
+        *load_project_data(file_path), min_profit_margin=min_profit_margin)
 
     # --------------------------------------------H--------------------------------------------------
     # Solve the CP-SAT model and determine how many possible solutions satisfy all the
@@ -241,18 +288,24 @@ def project_planning(file_path):
     # which contractors work on which projects in which month [1 point], and what is the profit
     # margin [1 point]
     # -----------------------------------------------------------------------------------------------
-    solver = cp_model.CpSolver()
-    solution_printer = ProjectPlanningSolutionPrinter(projects_to_take_on, contractor_project_month, profit_margin_expr)
+    solver = make_solver(profile, **overrides)
 
     # Search for all solutions
 
     # To many solutions if using solver.SearchForAllSolutions
-    status = solver.Solve(model, solution_printer)
+    # Solve() does not enumerate: with several workers the same plan can be reported more than once
+    # during the search, so only the final solution of the solver is printed and no solution count
+    status = solver.Solve(model)
 
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        print('Total solutions found: ' + str(solution_printer.solution_count()))
+        print(render_project_plan(1, final_plan(solver, projects_to_take_on, contractor_project_month,
+                                                profit_margin_expr)))
     else:
         print('No solution found.')
+        print('Run explain_infeasibility.py --min-profit-margin ' + str(min_profit_margin) +
+              ' to find the constraints that conflict.')
+
+    return solver
 
 
 
@@ -263,4 +316,5 @@ def main():
     project_planning(file_path)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+from ortools.sat.python import cp_model
+
+from project_planning_task3 import build_project_planning_model, final_plan, load_project_data, render_project_plan
+from solver_profiles import make_solver
+
+# Rolling horizon planning for the months of the Projects sheet.
+# Every run solves only a sliding window of months. The first months of the window are committed:
+# their contractor assignments and the decisions of the projects that have work in them become fixed
+# and are summarised in the state file (project decisions and the cost already spent), so the model
+# of the next run only contains the variables of the new window, however long the history gets.
+# The assignment of the previous window is used as a hint to warm-start the next one.
+# New projects (rows) and new months (columns) can be added to the Excel file between runs.
+# usage: python rolling_horizon.py --state plan_state.json --window 6 --commit 1
+
+
+def new_state():
+    return {
+        # index of the first month that is not committed yet
+        'next_month': 0,
+        # fixed decisions of the projects that have work in committed months
+        'projects': {},
+        # cost of all committed contractor assignments
+        'cost': 0,
+        # committed contractor assignments [contractor, project, job, month]
+        'assignments': [],
+        # assignment of the previous window, used as hint
+        'hint_projects': {},
+        'hint_assignments': [],
+    }
+
+
+def load_state(state_path):
+    if not os.path.exists(state_path):
+        return new_state()
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def save_state(state, state_path):
+    # write to a temporary file first, so an interrupted run does not corrupt the state
+    with open(state_path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def project_months(df1_projects):
+    # {project: [months with a job]} from the Projects sheet
+    months = list(df1_projects.columns[1:])
+    return {row[df1_projects.columns[0]]: [month for month in months if not pd.isna(row[month])]
+            for _, row in df1_projects.iterrows()}
+
+
+def plan_window(file_path, state_path, window=6, commit=1, profile="deterministic", **overrides):
+    # without a committed month the state never advances and every run replans the same window
+    if commit < 1:
+        raise ValueError("commit must be at least 1 month, got " + str(commit))
+    if window < commit:
+        raise ValueError("window (" + str(window) + ") must not be smaller than commit (" + str(commit) + ")")
+
+    state = load_state(state_path)
+    df1_projects, df2_quotes, df3_dependencies, df4_value = load_project_data(file_path)
+
+    months = list(df1_projects.columns[1:])
+    start = state['next_month']
+    if start >= len(months):
+        print('All months are committed, nothing left to plan.')
+        return None
+    window_months = months[start:start + window]
+    commit_months = window_months[:commit]
+    print('Planning ' + ', '.join(window_months) + ' (committing ' + ', '.join(commit_months) + ')')
+
+    # The decision of a project is committed with its first month. If its later jobs lie after the window,
+    # the window cannot check that they can be staffed, and a committed project that cannot be staffed
+    # makes every later window infeasible.
+    window_end = months.index(window_months[-1])
+    for project, work_months in project_months(df1_projects).items():
+        if project in state['projects'] or not any(month in commit_months for month in work_months):
+            continue
+        if any(months.index(month) > window_end for month in work_months):
+            print('Warning: ' + project + ' runs until ' + work_months[-1] + ', after the window (' +
+                  window_months[-1] + '), so its later jobs are not checked. Use a window of at least ' +
+                  str(months.index(work_months[-1]) - start + 1) + ' months.')
+
+    # Projects with work in the past that were never taken on cannot be started anymore
+    committed_projects = dict(state['projects'])
+    for project, work_months in project_months(df1_projects).items():
+        if project not in committed_projects and any(months.index(month) < start for month in work_months):
+            committed_projects[project] = 0
+
+    model, projects_to_take_on, contractor_project_month, profit_margin_expr = build_project_planning_model(
+        df1_projects, df2_quotes, df3_dependencies, df4_value, months=window_months,
+        committed={'projects': committed_projects, 'cost': state['cost']})
+
+    # Warm start from the previous window, the overlapping months keep their assignment
+    hint_assignments = set(tuple(key) for key in state['hint_assignments'])
+    for project, variable in projects_to_take_on.items():
+        if project in state['hint_projects']:
+            model.AddHint(variable, state['hint_projects'][project])
+    for key, variable in contractor_project_month.items():
+        model.AddHint(variable, key in hint_assignments)
+
+    solver = make_solver(profile, **overrides)
+    status = solver.Solve(model)
+
+    if status != cp_model.OPTIMAL and status != cp_model.FEASIBLE:
+        print('No solution found for this window, the state is left unchanged.')
+        return solver
+
+    # the margin only contains the costs up to the end of the window, the months after it are not planned yet
+    print(render_project_plan(1, final_plan(solver, projects_to_take_on, contractor_project_month, profit_margin_expr),
+                              margin_label='Estimated profit margin (costs until ' + window_months[-1] + ')'))
+
+    # Commit the first months of the window
+    quotes = df2_quotes.set_index(df2_quotes.columns[0])
+    assignments = [key for key, variable in contractor_project_month.items() if solver.Value(variable)]
+    for contractor, project, job, month in assignments:
+        if month in commit_months:
+            state['assignments'].append([contractor, project, job, month])
+            state['cost'] += int(quotes.at[contractor, job])
+    committed_until = start + len(commit_months)
+    for project, work_months in project_months(df1_projects).items():
+        if project not in state['projects'] and any(months.index(month) < committed_until for month in work_months):
+            state['projects'][project] = int(solver.Value(projects_to_take_on[project]))
+
+    state['hint_projects'] = {project: int(solver.Value(variable)) for project, variable in projects_to_take_on.items()}
+    state['hint_assignments'] = [list(key) for key in assignments]
+    state['next_month'] = committed_until
+    save_state(state, state_path)
+    return solver
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling horizon project planning")
+    parser.add_argument("--file-path", default="datasets/Assignment_DA_1_data.xlsx")
+    parser.add_argument("--state", default="plan_state.json", help="state file kept between runs")
+    parser.add_argument("--window", type=int, default=6, help="number of months solved per run")
+    parser.add_argument("--commit", type=int, default=1, help="number of months committed per run")
+    parser.add_argument("--profile", default="deterministic")
+    args = parser.parse_args()
+    if args.commit < 1 or args.window < args.commit:
+        parser.error("--commit must be at least 1 and --window at least --commit")
+    plan_window(args.file_path, args.state, args.window, args.commit, args.profile)
+
+
+if __name__ == "__main__":
+    main()
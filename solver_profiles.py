@@ -0,0 +1,74 @@
+import os
+
+from ortools.sat.python import cp_model
+
+
+# Named solver configuration profiles shared by the three tasks.
+# reference: https://github.com/google/or-tools/blob/stable/ortools/sat/docs/troubleshooting.md
+# reference: https://github.com/google/or-tools/blob/stable/ortools/sat/sat_parameters.proto
+
+# Fixed portfolio for the deterministic profile, so that the same subsolvers run on every machine
+# no matter how many cores it has. These are the full problem subsolvers that CP-SAT runs for the
+# task models, which have no objective (no core, fixed search or pseudo costs subsolvers).
+DETERMINISTIC_SUBSOLVERS = ["default_lp", "max_lp", "no_lp", "quick_restart", "quick_restart_no_lp"]
+
+PROFILES = {
+    # find a first feasible plan quickly with a small portfolio and no LP relaxation
+    "fast-feasible": {
+        "num_workers": 8,
+        "random_seed": 0,
+        "linearization_level": 0,
+        "max_time_in_seconds": 10.0,
+    },
+    # same result on every run and every box: interleaved search over a fixed set of subsolvers,
+    # limited by deterministic time instead of wall time
+    "deterministic": {
+        "num_workers": 8,
+        "interleave_search": True,
+        "random_seed": 42,
+        "subsolvers": DETERMINISTIC_SUBSOLVERS,
+        "max_deterministic_time": 60.0,
+    },
+    # use every core of the machine
+    "max-throughput": {
+        "num_workers": os.cpu_count() or 1,
+        "max_time_in_seconds": 60.0,
+    },
+    # single worker without LP relaxation and with a memory cap
+    "low-memory": {
+        "num_workers": 1,
+        "linearization_level": 0,
+        "max_memory_in_mb": 1024,
+        "max_time_in_seconds": 60.0,
+    },
+}
+
+
+def profile_parameters(profile=None, enumerate_all=False, **overrides):
+    # Parameters of a profile with the overrides applied. None means the solver defaults.
+    if profile is not None and profile not in PROFILES:
+        raise ValueError("Unknown solver profile '" + str(profile) + "', choose one of: " + ", ".join(PROFILES))
+    parameters = dict(PROFILES[profile]) if profile is not None else {}
+    parameters.update(overrides)
+    if enumerate_all:
+        # CP-SAT only enumerates all solutions with a single sequential worker: interleaved search is
+        # rejected as invalid and parallel workers silently miss solutions
+        parameters.pop("interleave_search", None)
+        parameters.pop("subsolvers", None)
+        parameters["num_workers"] = 1
+    return parameters
+
+
+def configure_solver(solver, profile=None, enumerate_all=False, **overrides):
+    for name, value in profile_parameters(profile, enumerate_all, **overrides).items():
+        field = getattr(solver.parameters, name)
+        if isinstance(value, (list, tuple)):
+            field.clear()
+            field.extend(value)
+        else:
+            setattr(solver.parameters, name, value)
+    return solver
+
+
+def make_solver(profile=None, enumerate_all=False, **overrides):
+    return configure_solver(cp_model.CpSolver(), profile, enumerate_all, **overrides)
@@ -0,0 +1,115 @@
+import argparse
+import contextlib
+import io
+import os
+import statistics
+
+import project_planning_task3
+import sudoku_task2
+import task1
+
+# Measure the speedup curve of each task model from 1 to N workers, so that a core budget can be
+# chosen per workload. Each run uses the given solver profile with num_workers overridden, the
+# printed solutions are discarded and the solver wall time is recorded.
+# usage: python speedup_harness.py --profile max-throughput --max-workers 32 --repeats 5
+#        python speedup_harness.py --check-determinism
+
+
+def models(file_path):
+    return {
+        "task1": lambda **parameters: task1.main(**parameters),
+        "sudoku": lambda **parameters: sudoku_task2.sudoku(9, **parameters),
+        "project planning": lambda **parameters: project_planning_task3.project_planning(file_path, **parameters),
+    }
+
+
+def worker_counts(max_workers):
+    # 1, 2, 4, 8, ... and always max_workers itself
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def measure(run, profile, workers, repeats):
+    wall_times = []
+    effective_workers = workers
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            solver = run(profile=profile, num_workers=workers)
+        wall_times.append(solver.WallTime())
+        # enumeration models are clamped to a single worker by the profile
+        effective_workers = solver.parameters.num_workers
+    return statistics.median(wall_times), effective_workers
+
+
+def check_deterministic_output(run, worker_counts=(1, 2, 4, 8), profile="deterministic"):
+    # The printed output of a model must be identical for every worker count
+    outputs = []
+    for workers in worker_counts:
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            run(profile=profile, num_workers=workers)
+        outputs.append(output.getvalue())
+    return all(output == outputs[0] for output in outputs)
+
+
+def speedup_curve(run, profile, max_workers, repeats):
+    # speedup and efficiency are None for models that stay on a single worker (enumeration), the sweep
+    # stops there because every further point would only measure timer noise
+    curve = []
+    baseline = None
+    for workers in worker_counts(max_workers):
+        wall_time, effective_workers = measure(run, profile, workers, repeats)
+        if baseline is None:
+            baseline = wall_time
+        elif effective_workers == 1:
+            curve.append((workers, effective_workers, wall_time, None, None))
+            break
+        speedup = baseline / wall_time if wall_time > 0 else float("nan")
+        curve.append((workers, effective_workers, wall_time, speedup, speedup / workers))
+    return curve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Speedup curve of the CP-SAT models from 1 to N workers")
+    parser.add_argument("--profile", default="max-throughput")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--file-path", default="datasets/Assignment_DA_1_data.xlsx")
+    parser.add_argument("--model", action="append", help="only measure these models (default: all)")
+    parser.add_argument("--check-determinism", action="store_true",
+                        help="check that the deterministic profile prints the same output at 1, 2, 4 and 8 workers")
+    args = parser.parse_args()
+
+    if args.check_determinism:
+        identical = True
+        for name, run in models(args.file_path).items():
+            if args.model and name not in args.model:
+                continue
+            same_output = check_deterministic_output(run)
+            identical = identical and same_output
+            print(name + ": " + ("identical output" if same_output else "OUTPUT DIFFERS") + " at 1, 2, 4 and 8 workers")
+        raise SystemExit(0 if identical else 1)
+
+    for name, run in models(args.file_path).items():
+        if args.model and name not in args.model:
+            continue
+        print(name + " (profile " + args.profile + ")")
+        print("  workers | effective | wall time (s) | speedup | efficiency")
+        for workers, effective_workers, wall_time, speedup, efficiency in speedup_curve(
+                run, args.profile, args.max_workers, args.repeats):
+            if speedup is None:
+                print("  {:7d} | {:9d} | {:13.4f} | {:>7} | {:>10}".format(
+                    workers, effective_workers, wall_time, "n/a", "n/a"))
+                print("  (runs on a single worker only, no speedup sweep)")
+            else:
+                print("  {:7d} | {:9d} | {:13.4f} | {:7.2f} | {:10.2f}".format(
+                    workers, effective_workers, wall_time, speedup, efficiency))
+        print()
+
+
+if __name__ == "__main__":
+    main()
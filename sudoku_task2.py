@@ -5,26 +5,26 @@
 
 from ortools.sat.python import cp_model
 
+from solution_collector import SolutionCollector, flatten, text_formatter
+from solver_profiles import make_solver
 
-class SolutionPrinter_Sudoku(cp_model.CpSolverSolutionCallback):
-    def __init__(self, N, field):
-        cp_model.CpSolverSolutionCallback.__init__(self)
-        self.field_ = field
-        self.N_ = N
-        self.solutions_ = 0
-
-    def on_solution_callback(self):
-        self.solutions_ += 1
-        print("Solution " + str(self.solutions_))
-        for i in range(self.N_):
+
+# Render one solution collected by the SolutionCollector, keys are (row, column)
+def render_sudoku(N):
+    def render(number, assignment):
+        lines = ["Solution " + str(number)]
+        for i in range(N):
             line = "|"
-            for j in range(self.N_):
-                line += str(self.Value(self.field_[i][j])) + " |"
-            print(line)
-        print("----------------------------")
+            for j in range(N):
+                line += str(assignment[(i, j)]) + " |"
+            lines.append(line)
+        lines.append("----------------------------")
+        return "\n".join(lines)
 
+    return render
 
-def sudoku(N):
+
+def sudoku(N, profile="deterministic", **overrides):
     model = cp_model.CpModel()
 
     # Identify and create the decision variables for the Sudoku puzzle
@@ -83,9 +83,12 @@ def sudoku(N):
 
     # Solve the CP-SAT model and determine how many solutions can be found for the above
     # instance
-    solver = cp_model.CpSolver()
-    solution_printer = SolutionPrinter_Sudoku(N, grid)
-    status = solver.SearchForAllSolutions(model, solution_printer)
+    # all solutions are enumerated, so the profile runs with a single worker
+    solver = make_solver(profile, enumerate_all=True, **overrides)
+    keys, variables = flatten(grid)
+    solution_collector = SolutionCollector(keys, variables)
+    status = solver.SearchForAllSolutions(model, solution_collector)
+    print(solution_collector.format(text_formatter, render_sudoku(N)))
 
     # Output all these solutions
     if status == cp_model.OPTIMAL:
@@ -93,10 +96,12 @@ def sudoku(N):
             row_values = []
             for j in range(N):
                 row_values.append(int(solver.Value(grid[i][j])))
-        print("\nThus, total solutions found: " + str(solution_printer.solutions_))
+        print("\nThus, total solutions found: " + str(solution_collector.solution_count()))
     else:
         print("No solution")
 
+    return solver
+
 
 def main():
     # Grid size (default is 9 x 9)
@@ -104,4 +109,5 @@ def main():
     sudoku(N)
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 from ortools.sat.python import cp_model
 
+from solution_collector import SolutionCollector, flatten, text_formatter
+from solver_profiles import make_solver
+
 # Identify the objects, attributes and predicates for the puzzle
 # And create the decision variables in a CP-SAT model
 
@@ -18,39 +21,20 @@ deserts = ["ice cream", "chocolate cake", "apple crumble", "tiramisu"]
 drinks = ["beer", "coke", "red wine", "white wine"]
 
 
-class SolutionPrinter(cp_model.CpSolverSolutionCallback):
-    def __init__(self, solver, starter, main, desert, drink):
-        cp_model.CpSolverSolutionCallback.__init__(self)
-        self.solver = solver
-        self.starter_ = starter
-        self.main_ = main
-        self.desert_ = desert
-        self.drink_ = drink
-        self.solutions_ = 0
+# Render one solution collected by the SolutionCollector, keys are (attribute, person, item)
+def render_solution(number, assignment):
+    lines = ["solution " + str(number)]
+    for person in persons:
+        lines.append(" - " + person + ":")
+        for attribute, items in (("starter", starters), ("main", mains), ("desert", deserts), ("drink", drinks)):
+            for item in items:
+                if assignment[(attribute, person, item)]:
+                    lines.append("    -  " + item)
+    lines.append("")
+    return "\n".join(lines)
 
-    def OnSolutionCallback(self):
-        self.solutions_ = self.solutions_ + 1
-        print("solution", self.solutions_)
 
-        for person in persons:
-            print(" - " + person + ":")
-            for starter in starters:
-                if (self.Value(self.starter_[person][starter])):
-                    print("    - ", starter)
-            for main in mains:
-                if (self.Value(self.main_[person][main])):
-                    print("    - ", main)
-            for desert in deserts:
-                if (self.Value(self.desert_[person][desert])):
-                    print("    - ", desert)
-            for drink in drinks:
-                if (self.Value(self.drink_[person][drink])):
-                    print("    - ", drink)
-
-        print()
-
-
-def main():
+def main(profile="deterministic", **overrides):
     model = cp_model.CpModel()
 
     # --------------------------------------------------------------------
@@ -344,15 +328,18 @@ def main():
         # sentence 4.2: Daniel does not order mushroom tart
         model.AddBoolOr([person_starters["Daniel"]["mushroom tart"].Not()])
 
-    solver = cp_model.CpSolver()
+    # all solutions are enumerated, so the profile runs with a single worker
+    solver = make_solver(profile, enumerate_all=True, **overrides)
 
     # Solve the CP-SAT model and determine the starter, main course, dessert, and drink ordered
     # by each of the diners
 
-    status = solver.SearchForAllSolutions(
-        model,
-        SolutionPrinter(solver, person_starters, person_mains, person_deserts, person_drinks)
-    )
+    # Collect the solutions in bulk and format them after the search
+    keys, variables = flatten({"starter": person_starters, "main": person_mains,
+                               "desert": person_deserts, "drink": person_drinks})
+    collector = SolutionCollector(keys, variables, booleans=True)
+    status = solver.SearchForAllSolutions(model, collector)
+    print(collector.format(text_formatter, render_solution))
     print(solver.StatusName(status))
 
     if solver.StatusName(status) == "OPTIMAL":
@@ -360,5 +347,8 @@ def main():
             if solver.Value(person_deserts[person]["tiramisu"]):
                 print(person + " has tiramisu for dessert")
 
+    return solver
+
 
-main()
+if __name__ == "__main__":
+    main()